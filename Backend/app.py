@@ -1,31 +1,231 @@
-from flask import Flask, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
 import os
+
+# Pin math-library thread pools before torch/transformers/TensorFlow are imported:
+# gunicorn already runs one worker per core, so per-call OpenMP/MKL pools would
+# only oversubscribe the CPU. Override with TRUST_NUM_THREADS.
+NUM_THREADS = os.environ.get('TRUST_NUM_THREADS', '1')
+for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+            'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+    os.environ.setdefault(var, NUM_THREADS)
+
+# torch is pinned by verifier.model_loader when the first model loads (it isn't imported here)
+import cv2
+cv2.setNumThreads(int(NUM_THREADS))
+
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+import time
+import uuid
+import random
+from datetime import datetime, timedelta
+import shutil
+import tempfile
+import threading
+try:
+    import fcntl
+except ImportError:
+    # Windows: no file locks, and the dev server is a single process anyway
+    fcntl = None
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
+import blake3
+import brotli
+import orjson
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+from flask_caching import Cache
 
 # Import verification functions
+from verifier import face_verifier, nlp_scores, ocr_verifier
 from verifier.face_verifier import verify_face
 from verifier.ocr_verifier import verify_supporting_document
-from verifier.story_nlp import StoryNLPVerifier
-from verifier.emotion_detector import detect_emotion
-from verifier.engagement_score import calculate_engagement_score
-from verifier.trust_score import calculate_trust_score
-from models import db, TrustScoreRecord
+from verifier.nlp_scores import score_all
+from verifier.trust_score import calculate_trust_score, calculate_trust_scores
+from models import db, TrustScoreRecord, bulk_update_records, mark_records_failed
+from celery.result import AsyncResult
+from tasks import REDIS_URL, celery, run_trust_pipeline
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# orjson handles datetimes and numpy scalars natively and is much faster than stdlib json
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+class ORJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Spool each uploaded file part on its own: small parts stay in memory, anything
+# over SPOOL_MAX_SIZE goes to a temp file while parsing instead of growing in RAM.
+SPOOL_MAX_SIZE = 1 << 20
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode='rb+')
+
+class ORJSONFlask(Flask):
+    json_provider_class = ORJSONProvider
+    request_class = UploadRequest
+
 # Flask app setup
-app = Flask(__name__)
+app = ORJSONFlask(__name__)
 CORS(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///trustscores.db'
+# Compress responses (brotli preferred, gzip fallback). Flask-Compress buffers a
+# streamed response to compress it, so streams are left to compress_stream instead.
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+# Response cache for /records; point CACHE_REDIS_URL at Redis to share it across workers.
+# Queued jobs save their records in the Celery worker, whose cache invalidation the web
+# workers only see through a shared cache, so with TRUST_ASYNC_JOBS=1 it defaults to
+# the broker's Redis.
+ASYNC_JOBS = os.environ.get('TRUST_ASYNC_JOBS', '0') == '1'
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL') or (REDIS_URL if ASYNC_JOBS else None)
+app.config['CACHE_TYPE'] = 'RedisCache' if app.config['CACHE_REDIS_URL'] else 'SimpleCache'
+if app.config['CACHE_TYPE'] == 'SimpleCache':
+    logger.warning(
+        "⚠️ /records cache is per process: with several workers a listing can lag new "
+        "records by up to a minute. Set CACHE_REDIS_URL to share it."
+    )
+cache = Cache(app)
+# Set DATABASE_URL (e.g. postgresql+psycopg://...) to move off SQLite's single-writer lock
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///trustscores.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Bigger compiled-statement cache and warm, health-checked pooled connections
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'query_cache_size': 1200,
+    'pool_size': 20,
+    'pool_pre_ping': True
+}
+# Queue /submit through Celery instead of verifying inside the request
+app.config['ASYNC_JOBS'] = ASYNC_JOBS
+# Upload limits: reject oversized requests, keep text form fields small
+app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
+app.config['MAX_FORM_MEMORY_SIZE'] = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB copy buffer
+# Uploads up to this size are verified from memory; larger ones from disk
+IN_MEMORY_UPLOAD_LIMIT = 8 * 1024 * 1024
+# Share of duplicate submissions that are verified again instead of served from the DB
+REVERIFY_RATE = float(os.environ.get('TRUST_REVERIFY_RATE', '0.05'))
+# A queued submission still pending after this long is assumed lost and queued again
+PENDING_TIMEOUT_SECONDS = int(os.environ.get('TRUST_PENDING_TIMEOUT_MINUTES', '30')) * 60
+
+# Uploaded files are staged here for the verifiers. They are only needed while a
+# submission is being verified, so default to tmpfs (RAM) where available.
+DEFAULT_UPLOAD_DIR = "/dev/shm/trust_uploads" if os.path.isdir("/dev/shm") else "temp"
+UPLOAD_DIR = os.environ.get('TRUST_UPLOAD_DIR', DEFAULT_UPLOAD_DIR)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Staged files are deleted once a submission is processed unless kept for auditing
+app.config['KEEP_UPLOADS'] = os.environ.get('TRUST_KEEP_UPLOADS', '0') == '1'
+# File names inside a submission's staging directory
+UPLOAD_FILENAMES = {
+    'id_image': 'id.jpg',
+    'selfie_image': 'selfie.jpg',
+    'supporting_doc': 'supporting_doc.pdf',
+    'aadhaar_doc': 'aadhaar.jpg',
+    'pan_doc': 'pan.jpg'
+}
+# tmpfs pins RAM, so staged files older than this are swept away
+SWEEPER_LOCK_NAME = '.sweeper.lock'
+UPLOAD_TTL_SECONDS = int(os.environ.get('TRUST_UPLOAD_TTL_MINUTES', '30')) * 60
+
+# Largest page /records will return when a limit is requested
+MAX_RECORDS_PAGE_SIZE = 1000
+# Rows fetched (and serialized) per round trip while streaming /records
+RECORDS_FETCH_SIZE = 200
+# The full (unpaginated) /records body is cached under this key (plus the current
+# version, see records_cache_key) until a write
+RECORDS_CACHE_KEY = "records_all"
+RECORDS_CACHE_VERSION_KEY = "records_version"
+RECORDS_CACHE_TIMEOUT = 60
 db.init_app(app)
 
-# Story NLP Verifier instance
-story_verifier = StoryNLPVerifier()
+# Staging directories of queued submissions that a worker may still pick up
+def pending_upload_dirs():
+    queued_after = datetime.utcnow() - timedelta(seconds=PENDING_TIMEOUT_SECONDS)
+    with app.app_context():
+        paths = db.session.scalars(
+            select(TrustScoreRecord.id_image_path).where(
+                TrustScoreRecord.status == 'pending',
+                TrustScoreRecord.queued_at >= queued_after
+            )
+        ).all()
+    return {os.path.abspath(os.path.dirname(path)) for path in paths if path}
+
+# Background sweeper for staged uploads (cleanup is mandatory on tmpfs)
+def sweep_uploads():
+    if app.config['KEEP_UPLOADS']:
+        # Kept for auditing: never swept
+        return
+    cutoff = time.time() - UPLOAD_TTL_SECONDS
+    pending_dirs = pending_upload_dirs()
+    with os.scandir(UPLOAD_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.name == SWEEPER_LOCK_NAME:
+                    continue
+                if entry.stat().st_mtime >= cutoff or os.path.abspath(entry.path) in pending_dirs:
+                    continue
+                if entry.is_dir():
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+            except OSError as e:
+                logger.warning(f"Could not remove stale upload {entry.path}: {e}")
+
+# Started by each serving process (gunicorn's post_fork, or `python app.py`), not on
+# import. Only the process holding the lock file sweeps; another takes over if it exits.
+def start_upload_sweeper(interval=60):
+    def run():
+        lock_file = open(os.path.join(UPLOAD_DIR, SWEEPER_LOCK_NAME), 'a')
+        holds_lock = fcntl is None
+        while True:
+            time.sleep(interval)
+            if not holds_lock:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    holds_lock = True
+                except BlockingIOError:
+                    continue
+            try:
+                sweep_uploads()
+            except Exception as e:
+                logger.warning(f"Upload sweep failed: {e}")
+    threading.Thread(target=run, name="upload-sweeper", daemon=True).start()
+
+# Load every model at import time, so with gunicorn's preload it happens once in the
+# master and workers share the weights copy-on-write. The warm-up inference starts
+# TF/torch thread pools, which don't survive a fork: under preload it runs in each
+# worker instead (gunicorn.conf.py sets TRUST_WARMUP_AFTER_FORK and calls warmup_worker).
+WARMUP = os.environ.get('TRUST_WARMUP', '1') == '1'
+
+def load_models():
+    face_verifier.get_face_model()
+    nlp_scores.load_models()
+
+def warmup_models():
+    face_verifier.warmup()
+    ocr_verifier.warmup()
+    nlp_scores.warmup()
+
+def warmup_worker():
+    if WARMUP:
+        warmup_models()
+
+if WARMUP:
+    load_models()
+    if os.environ.get('TRUST_WARMUP_AFTER_FORK') != '1':
+        warmup_models()
 
 # Home route to avoid 404
 @app.route('/', methods=['GET'])
@@ -34,26 +234,261 @@ def home():
         "message": "🚀 Welcome to AIKYA the Trust Score API!",
         "endpoints": {
             "submit": "/submit [POST]",
-            "records": "/records [GET]"
+            "records": "/records [GET]",
+            "record": "/records/<record_id> [GET]",
+            "jobs": "/jobs/<job_id> [GET]"
         }
     })
 
-# Trust Score Calculation
-def calculate_trust_score(story, face_score, doc_score, emotion_score, engagement_score, admin_adjustment):
-    story_score = min(len(story) / 20, 25)  # Max story weight is 25
-    trust_score = round(
-        0.2 * face_score +
-        0.2 * doc_score +
-        0.15 * emotion_score +
-        0.25 * story_score +
-        0.1 * engagement_score +
-        0.1 * admin_adjustment,
-        2
+# Copy an uploaded file to disk in large chunks instead of reading it into memory,
+# hashing it on the way through. Returns the file's BLAKE3 digest.
+def save_upload(file_obj, path):
+    hasher = blake3.blake3()
+    stream = file_obj.stream
+    with open(path, 'wb', buffering=UPLOAD_CHUNK_SIZE) as dst:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            dst.write(chunk)
+    return hasher.digest()
+
+def upload_size(file_obj):
+    stream = file_obj.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+# Shared pool for the blocking verifier and file work. Flask runs every async view on a
+# fresh event loop, so asyncio.to_thread would spin up a new default pool per request.
+# The models and OpenCV/Tesseract release the GIL in native code, so threads overlap.
+VERIFIER_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="verifier")
+
+def run_in_pool(fn, *args, **kwargs):
+    return asyncio.wrap_future(VERIFIER_EXECUTOR.submit(fn, *args, **kwargs))
+
+def remove_uploads(paths):
+    staging_dirs = set()
+    for path in paths:
+        staging_dirs.add(os.path.dirname(path))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove upload {path}: {e}")
+    # Then the submission's (now empty) staging directory
+    for staging_dir in staging_dirs - {UPLOAD_DIR}:
+        try:
+            os.rmdir(staging_dir)
+        except OSError:
+            pass
+
+# Background writer for uploads that are verified from memory
+persist_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-persist")
+
+def write_upload(path, data):
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+    except OSError as e:
+        logger.warning(f"Could not persist upload {path}: {e}")
+
+# Every write moves the listing to a new version key, so a listing read before the
+# write (e.g. still streaming to a slow client) can never be cached over it
+def records_cache_key():
+    return f"{RECORDS_CACHE_KEY}:{cache.get(RECORDS_CACHE_VERSION_KEY) or ''}"
+
+def invalidate_records_cache():
+    cache.set(RECORDS_CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=0)
+
+# Fingerprint of everything that feeds the trust score (form fields + file contents)
+def submission_fingerprint(form_data, file_digests):
+    hasher = blake3.blake3()
+    for field in sorted(form_data):
+        hasher.update(field.encode())
+        hasher.update(b"\0")
+        hasher.update(form_data[field].encode())
+        hasher.update(b"\0")
+    for digest in file_digests:
+        hasher.update(digest)
+    return hasher.hexdigest()
+
+def submission_response(record):
+    return {
+        "message": "✅ Trust score generated successfully",
+        "user_id": record.user_id,
+        "name": record.name,
+        "trust_score": record.trust_score,
+        "face_match": record.face_match,
+        "document_verified": record.document_verified,
+        "story_score": record.emotion_score,
+        "status": record.status
+    }
+
+# Placeholder row for a queued submission; the worker fills in the scores
+def create_pending_record(form_data, file_paths, content_hash):
+    record = TrustScoreRecord(
+        user_id=form_data['user_id'],
+        name=form_data['name'],
+        story=form_data['story'],
+        trust_score=0.0,
+        status='pending',
+        id_image_path=file_paths['id_image'],
+        selfie_image_path=file_paths['selfie_image'],
+        supporting_doc_type=form_data['supporting_doc_type'],
+        supporting_doc_path=file_paths['supporting_doc'],
+        aadhaar_number=form_data['aadhaar_number'],
+        pan_number=form_data['pan_number'],
+        aadhaar_file_path=file_paths['aadhaar_doc'],
+        pan_file_path=file_paths['pan_doc'],
+        content_hash=content_hash,
+        queued_at=datetime.utcnow()
+    )
+    db.session.add(record)
+    db.session.commit()
+    invalidate_records_cache()
+    return record
+
+def pending_is_stale(record):
+    """A pending record whose job has run longer than PENDING_TIMEOUT_SECONDS was most likely lost."""
+    queued_at = record.queued_at or record.created_at
+    return queued_at is None or datetime.utcnow() - queued_at > timedelta(seconds=PENDING_TIMEOUT_SECONDS)
+
+def requeue_record(record, file_paths):
+    # Completed rows keep serving their old result until the new job replaces it
+    if record.status != 'completed':
+        record.status = 'pending'
+    record.queued_at = datetime.utcnow()
+    # The new job reads this submission's freshly staged files
+    record.id_image_path = file_paths['id_image']
+    record.selfie_image_path = file_paths['selfie_image']
+    record.supporting_doc_path = file_paths['supporting_doc']
+    record.aadhaar_file_path = file_paths['aadhaar_doc']
+    record.pan_file_path = file_paths['pan_doc']
+    db.session.commit()
+    invalidate_records_cache()
+
+def queued_response(record, task_id=None):
+    return {
+        "message": "⏳ Submission queued for verification",
+        "job_id": task_id,
+        "record_id": record.id,
+        "status": record.status,
+        "status_url": f"/records/{record.id}"
+    }
+
+# Verification pipeline: runs every verifier over the saved files and stores the record.
+# Used inline by /submit and by the Celery worker (tasks.run_trust_pipeline).
+async def process_submission(form_data, file_paths, content_hash=None, file_data=None, store=None, record_id=None):
+    # `store(fields)` replaces the per-call insert/update + commit;
+    # the Celery worker passes its group-commit buffer here.
+    # `record_id` is the pending row created by /submit for a queued submission.
+    # Verifiers read the in-memory uploads when given, otherwise the files on disk
+    sources = file_data or file_paths
+
+    # Identical resubmissions reuse the stored result; a small random share is
+    # re-verified anyway so model/threshold drift still gets picked up.
+    existing = None
+    if record_id is not None:
+        existing = db.session.get(TrustScoreRecord, record_id)
+    elif content_hash:
+        existing = TrustScoreRecord.query.filter_by(
+            user_id=form_data['user_id'], content_hash=content_hash
+        ).first()
+        if existing and existing.status == 'completed' and random.random() >= REVERIFY_RATE:
+            logger.info(f"♻️ Duplicate submission, reusing trust score for user: {form_data['name']}")
+            return submission_response(existing)
+
+    # Run verifications concurrently (each verifier works on its own inputs)
+    face_result, doc_score, nlp_scores = await asyncio.gather(
+        run_in_pool(
+            verify_face,
+            sources['id_image'], sources['selfie_image'],
+            form_data['aadhaar_number'], form_data['pan_number'],
+            aadhaar_file_path=sources['aadhaar_doc'],
+            pan_file_path=sources['pan_doc']
+        ),
+        run_in_pool(verify_supporting_document, sources['supporting_doc'], form_data['supporting_doc_type']),
+        # Emotion, engagement and story quality scores (one sentiment pass)
+        run_in_pool(score_all, form_data['story'])
+    )
+    emotion_score, engagement_score, story_score = nlp_scores
+
+    face_score = face_result.get("total_score", 0)
+    face_match = face_score >= 5
+    document_verified = doc_score >= 10
+
+    # Admin adjustment (default 0)
+    admin_adjustment = 0.0
+
+    # Final trust score (aggregated)
+    trust_score = calculate_trust_score(
+        face_score=face_score,
+        doc_score=doc_score,
+        emotion_score=emotion_score,
+        engagement_score=engagement_score,
+        story_score=story_score,
+        admin_adjustment=admin_adjustment
     )
-    return trust_score
+
+    # Save to DB (re-verified duplicates update their existing row)
+    fields = dict(
+        user_id=form_data['user_id'],
+        name=form_data['name'],
+        story=form_data['story'],
+        trust_score=trust_score,
+        face_match=face_match,
+        document_verified=document_verified,
+        emotion_score=emotion_score,
+        engagement_score=engagement_score,
+        admin_adjustment=admin_adjustment,
+        face_score=face_score,
+        story_score=story_score,
+        id_image_path=file_paths['id_image'],
+        selfie_image_path=file_paths['selfie_image'],
+        supporting_doc_type=form_data['supporting_doc_type'],
+        supporting_doc_path=file_paths['supporting_doc'],
+        supporting_doc_score=doc_score,
+        aadhaar_number=form_data['aadhaar_number'],
+        pan_number=form_data['pan_number'],
+        aadhaar_file_path=file_paths['aadhaar_doc'],
+        pan_file_path=file_paths['pan_doc'],
+        content_hash=content_hash,
+        status='completed'
+    )
+    if store:
+        # Rows with an id are applied as updates (e.g. filling in a pending record)
+        if existing:
+            fields['id'] = existing.id
+        store(fields)
+        logger.info(f"✅ Trust score queued for saving for user: {form_data['name']}")
+        return submission_response(TrustScoreRecord(**fields))
+    if existing:
+        record = existing
+        for key, value in fields.items():
+            setattr(record, key, value)
+    else:
+        record = TrustScoreRecord(**fields)
+        db.session.add(record)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent identical submission won the insert; return its result
+        db.session.rollback()
+        record = TrustScoreRecord.query.filter_by(
+            user_id=form_data['user_id'], content_hash=content_hash
+        ).one()
+    invalidate_records_cache()
+    logger.info(f"✅ Trust score saved for user: {form_data['name']}")
+
+    return submission_response(record)
 
 @app.route('/submit', methods=['POST'])
-def submit():
+async def submit():
     try:
         # Extract form data
         required_fields = ['name', 'story', 'supporting_doc_type', 'aadhaar_number', 'pan_number', 'user_id']
@@ -85,133 +520,295 @@ def submit():
             logger.warning(f"Missing required fields/files: {missing_fields}")
             return jsonify(error=f"Missing required fields/files: {missing_fields}"), 400
 
-        # Save uploaded files
-        upload_dir = "temp"
-        os.makedirs(upload_dir, exist_ok=True)
-
-        id_path = os.path.join(upload_dir, f"{form_data['name']}_id.jpg")
-        selfie_path = os.path.join(upload_dir, f"{form_data['name']}_selfie.jpg")
-        doc_path = os.path.join(upload_dir, f"{form_data['name']}_{form_data['supporting_doc_type']}.pdf")
-        aadhaar_path = os.path.join(upload_dir, f"{form_data['name']}_aadhaar.jpg")
-        pan_path = os.path.join(upload_dir, f"{form_data['name']}_pan.jpg")
-
-        required_files['id_image'].save(id_path)
-        required_files['selfie_image'].save(selfie_path)
-        required_files['supporting_doc'].save(doc_path)
-        required_files['aadhaar_doc'].save(aadhaar_path)
-        required_files['pan_doc'].save(pan_path)
-
-        logger.info("✔️ All images and documents saved.")
-
-        # Run verifications
-        face_result = verify_face(
-            id_path, selfie_path,
-            form_data['aadhaar_number'], form_data['pan_number'],
-            aadhaar_file_path=aadhaar_path,
-            pan_file_path=pan_path
-        )
-        face_score = face_result.get("total_score", 0)
-        face_match = face_score >= 5
-
-        doc_score = verify_supporting_document(doc_path, form_data['supporting_doc_type'])
-        document_verified = doc_score >= 10
-
-
-        # Emotion score (NLP sentiment)
-        emotion_score = detect_emotion(form_data['story'])
-
-        # Engagement score
-        engagement_score = calculate_engagement_score(form_data['story'])
-
-        # Story score (quality, authenticity, etc.)
-        story_score = story_verifier.score_story(form_data['story'])
-
-        # Admin adjustment (default 0)
-        admin_adjustment = 0.0
-
-        # Final trust score (aggregated)
-        trust_score = calculate_trust_score(
-            face_score, doc_score, emotion_score, engagement_score, story_score, admin_adjustment
-        )
-
-        # Save to DB
-        record = TrustScoreRecord(
-            user_id=form_data['user_id'],
-            name=form_data['name'],
-            story=form_data['story'],
-            trust_score=trust_score,
-            face_match=face_match,
-            document_verified=document_verified,
-            emotion_score=emotion_score,
-            engagement_score=engagement_score,
-            admin_adjustment=admin_adjustment,
-            id_image_path=id_path,
-            selfie_image_path=selfie_path,
-            supporting_doc_type=form_data['supporting_doc_type'],
-            supporting_doc_path=doc_path,
-            supporting_doc_score=doc_score,
-            aadhaar_number=form_data['aadhaar_number'],
-            pan_number=form_data['pan_number'],
-            aadhaar_file_path=aadhaar_path,
-            pan_file_path=pan_path
-        )
+        # Each submission is staged in its own directory; no user input goes into the
+        # paths, so concurrent submissions (even with the same name) never share files
+        staging_dir = tempfile.mkdtemp(dir=UPLOAD_DIR)
+        file_paths = {
+            key: os.path.join(staging_dir, filename)
+            for key, filename in UPLOAD_FILENAMES.items()
+        }
 
-        db.session.add(record)
-        db.session.commit()
-        logger.info(f"✅ Trust score saved for user: {form_data['name']}")
-
-        return jsonify({
-            "message": "✅ Trust score generated successfully",
-            "user_id": form_data['user_id'],
-            "name": form_data['name'],
-            "trust_score": trust_score,
-            "face_match": face_match,
-            "document_verified": document_verified,
-            "story_score": emotion_score
-        })
+        # Hand off to the job queue: persist a pending record right away and let
+        # the client poll /records/<id>. The worker is another process, so it
+        # needs the files on disk first.
+        if app.config['ASYNC_JOBS']:
+            # Staged files only outlive this request once a job is queued for them;
+            # duplicates, races and errors drop them right away
+            handed_off = False
+            try:
+                file_digests = await asyncio.gather(*(
+                    run_in_pool(save_upload, required_files[key], file_paths[key])
+                    for key in required_files
+                ))
+                logger.info("✔️ All images and documents saved.")
+                content_hash = submission_fingerprint(form_data, file_digests)
+
+                record = TrustScoreRecord.query.filter_by(
+                    user_id=form_data['user_id'], content_hash=content_hash
+                ).first()
+                if record and record.status == 'pending' and not pending_is_stale(record):
+                    # Same submission is already queued
+                    return jsonify(queued_response(record)), 202
+                if record and record.status == 'completed' and random.random() >= REVERIFY_RATE:
+                    logger.info(f"♻️ Duplicate submission, reusing trust score for user: {form_data['name']}")
+                    return jsonify(submission_response(record))
+                if record:
+                    # Failed, stuck pending, or picked for re-verification: queue it again
+                    requeue_record(record, file_paths)
+                else:
+                    try:
+                        record = create_pending_record(form_data, file_paths, content_hash)
+                    except IntegrityError:
+                        # A concurrent identical submission created the row first
+                        db.session.rollback()
+                        record = TrustScoreRecord.query.filter_by(
+                            user_id=form_data['user_id'], content_hash=content_hash
+                        ).one()
+                        return jsonify(queued_response(record)), 202
+
+                try:
+                    task = run_trust_pipeline.delay(form_data, file_paths, content_hash, record.id)
+                except Exception:
+                    # Broker unavailable: don't leave the record waiting for a job that never ran
+                    mark_records_failed([record.id])
+                    invalidate_records_cache()
+                    raise
+                # The worker owns (and removes) the staged files from here on
+                handed_off = True
+                logger.info(f"📨 Queued trust pipeline job {task.id} (record {record.id}) for user: {form_data['name']}")
+                return jsonify(queued_response(record, task.id)), 202
+            finally:
+                if not handed_off:
+                    remove_uploads(file_paths.values())
+
+        # Inline: verify small uploads straight from memory (their on-disk copies are
+        # only written, in the background, when uploads are kept). Large ones (big
+        # PDFs) are streamed to disk in chunks and verified from the saved file.
+        file_data = {}
+        file_digests = []
+        for key in required_files:
+            if upload_size(required_files[key]) <= IN_MEMORY_UPLOAD_LIMIT:
+                data = required_files[key].read()
+                if app.config['KEEP_UPLOADS']:
+                    persist_executor.submit(write_upload, file_paths[key], data)
+                file_data[key] = data
+                file_digests.append(blake3.blake3(data).digest())
+            else:
+                file_digests.append(await run_in_pool(save_upload, required_files[key], file_paths[key]))
+                file_data[key] = file_paths[key]
+        content_hash = submission_fingerprint(form_data, file_digests)
+
+        try:
+            return jsonify(await process_submission(form_data, file_paths, content_hash, file_data))
+        finally:
+            if not app.config['KEEP_UPLOADS']:
+                remove_uploads(file_paths.values())
 
     except Exception as e:
         logger.error(f"❌ Error in /submit: {e}", exc_info=True)
         return jsonify(error="An internal error occurred. Please try again later."), 500
 
+# Columns exposed by /records, selected directly so rows skip ORM hydration
+RECORD_COLUMNS = (
+    TrustScoreRecord.id,
+    TrustScoreRecord.user_id,
+    TrustScoreRecord.name,
+    TrustScoreRecord.story,
+    TrustScoreRecord.trust_score,
+    TrustScoreRecord.face_match,
+    TrustScoreRecord.document_verified,
+    TrustScoreRecord.emotion_score,
+    TrustScoreRecord.engagement_score,
+    TrustScoreRecord.admin_adjustment,
+    TrustScoreRecord.id_image_path,
+    TrustScoreRecord.selfie_image_path,
+    TrustScoreRecord.aadhaar_number,
+    TrustScoreRecord.pan_number,
+    TrustScoreRecord.aadhaar_file_path,
+    TrustScoreRecord.pan_file_path,
+    TrustScoreRecord.supporting_doc_type,
+    TrustScoreRecord.supporting_doc_path,
+    TrustScoreRecord.supporting_doc_score,
+    TrustScoreRecord.status,
+    TrustScoreRecord.created_at
+)
+
+# Stream {"records": [...], "next_after_id": ...} one fetched partition at a time,
+# so memory stays flat and orjson encodes each partition in a single C call
+def generate_records_json(result, limit):
+    yield b'{"records":['
+    count = 0
+    last_id = None
+    for partition in result.mappings().partitions():
+        if not partition:
+            continue
+        if count:
+            yield b','
+        # Serialize the partition as one JSON array and drop its brackets
+        yield orjson.dumps([dict(row) for row in partition], option=ORJSON_OPTIONS)[1:-1]
+        count += len(partition)
+        last_id = partition[-1]['id']
+    next_after_id = last_id if limit and count == limit else None
+    yield b'],"next_after_id":' + orjson.dumps(next_after_id) + b'}'
+
+# Pass the streamed chunks through and cache the whole body once it has been sent
+def cache_stream(chunks, key, timeout):
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(body), timeout=timeout)
+
+# Compress a streamed body chunk by chunk (brotli level 4 / gzip level 6, Flask-Compress's
+# defaults), so it is sent compressed without being buffered first
+def compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=4)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
 @app.route('/records', methods=['GET'])
 def get_records():
+    """
+    Keyset pagination: ?after_id=<last id seen>&limit=<page size>.
+    Without a limit every record after after_id is streamed.
+    The full listing (no parameters) is served from cache until the next write.
+    """
     try:
-        records = TrustScoreRecord.query.all()
-        result = []
-        for r in records:
-            result.append({
-                "id": r.id,
-                "user_id": r.user_id,
-                "name": r.name,
-                "story": r.story,
-                "trust_score": r.trust_score,
-                "face_match": r.face_match,
-                "document_verified": r.document_verified,
-                "emotion_score": r.emotion_score,
-                "engagement_score": r.engagement_score,
-                "admin_adjustment": r.admin_adjustment,
-                "id_image_path": r.id_image_path,
-                "selfie_image_path": r.selfie_image_path,
-                "aadhaar_number": r.aadhaar_number,
-                "pan_number": r.pan_number,
-                "aadhaar_file_path": r.aadhaar_file_path,
-                "pan_file_path": r.pan_file_path,
-                "supporting_doc_type": r.supporting_doc_type,
-                "supporting_doc_path": r.supporting_doc_path,
-                "supporting_doc_score": r.supporting_doc_score,
-                "created_at": r.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        return jsonify(records=result)
+        after_id = request.args.get('after_id', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, MAX_RECORDS_PAGE_SIZE))
+
+        full_listing = after_id == 0 and limit is None
+        if full_listing:
+            # Read the version before the SELECT; the body is cached under it
+            cache_key = records_cache_key()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached, mimetype='application/json')
+
+        stmt = (
+            select(*RECORD_COLUMNS)
+            .where(TrustScoreRecord.id > after_id)
+            .order_by(TrustScoreRecord.id)
+        )
+        if limit:
+            stmt = stmt.limit(limit)
+        result = db.session.execute(stmt.execution_options(yield_per=RECORDS_FETCH_SIZE))
+
+        body = generate_records_json(result, limit)
+        if full_listing:
+            body = cache_stream(body, cache_key, RECORDS_CACHE_TIMEOUT)
+        headers = {'Vary': 'Accept-Encoding'}
+        # Brotli preferred, as for the non-streamed responses
+        encoding = request.accept_encodings.best_match(['br', 'gzip'])
+        if encoding:
+            body = compress_stream(body, encoding)
+            headers['Content-Encoding'] = encoding
+        return Response(
+            stream_with_context(body),
+            mimetype='application/json',
+            headers=headers
+        )
     except Exception as e:
         logger.error(f"❌ Error fetching records: {e}", exc_info=True)
         return jsonify(error="Failed to fetch records."), 500
 
+@app.route('/records/<int:record_id>', methods=['GET'])
+def get_record(record_id):
+    """Result of one submission; `status` is pending until a queued job finishes."""
+    record = db.session.get(TrustScoreRecord, record_id)
+    if record is None:
+        return jsonify(error="Record not found."), 404
+    return jsonify(submission_response(record))
+
+# Rows loaded and rescored per batch by recompute_trust_scores
+RECOMPUTE_BATCH_SIZE = 5000
+
+def recompute_trust_scores():
+    """
+    Recompute trust_score for every record from its stored sub-scores (e.g. after
+    changing weights or admin adjustments), one numpy pass + bulk update per batch.
+    Only rows whose score changes are written; records saved before
+    face_score/story_score were stored are skipped.
+    """
+    columns = (
+        TrustScoreRecord.id,
+        TrustScoreRecord.trust_score,
+        TrustScoreRecord.face_score,
+        TrustScoreRecord.supporting_doc_score,
+        TrustScoreRecord.emotion_score,
+        TrustScoreRecord.engagement_score,
+        TrustScoreRecord.story_score,
+        TrustScoreRecord.admin_adjustment
+    )
+    updated = 0
+    after_id = 0
+    while True:
+        rows = db.session.execute(
+            select(*columns)
+            .where(
+                TrustScoreRecord.id > after_id,
+                TrustScoreRecord.face_score.isnot(None),
+                TrustScoreRecord.story_score.isnot(None)
+            )
+            .order_by(TrustScoreRecord.id)
+            .limit(RECOMPUTE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        ids, current, face, doc, emotion, engagement, story, admin = zip(*rows)
+        scores = calculate_trust_scores(
+            face, doc, emotion, engagement, story,
+            [value or 0.0 for value in admin]
+        )
+        changed = [
+            {"id": record_id, "trust_score": score}
+            for record_id, old_score, score in zip(ids, current, scores)
+            if score != old_score
+        ]
+        bulk_update_records(changed)
+        updated += len(changed)
+        after_id = ids[-1]
+    invalidate_records_cache()
+    logger.info(f"✅ Recomputed trust scores, {updated} records changed")
+    return updated
+
+@app.cli.command('recompute-scores')
+def recompute_scores_command():
+    """Recompute every stored trust score from its sub-scores."""
+    recompute_trust_scores()
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        job = AsyncResult(job_id, app=celery)
+        response = {"job_id": job_id, "state": job.state}
+        if job.successful():
+            response["result"] = job.result
+        elif job.failed():
+            response["error"] = "Verification failed."
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"❌ Error fetching job {job_id}: {e}", exc_info=True)
+        return jsonify(error="Failed to fetch job status."), 500
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+    start_upload_sweeper()
     logger.info("🚀 Trust Score API is running at http://127.0.0.1:5000")
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Dev server only; use `gunicorn wsgi:application` (see Procfile) in production.
+    # debug stays off so the reloader doesn't load every verifier model twice.
+    app.run(host="0.0.0.0", port=5000, debug=False)
 
 # from flask import Flask, request, jsonify
 # from flask_sqlalchemy import SQLAlchemy
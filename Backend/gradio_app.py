@@ -1,11 +1,24 @@
+import os
+import mimetypes
+from contextlib import ExitStack
 import gradio as gr
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
 
 FLASK_URL = "http://127.0.0.1:5000"  # Your Flask backend
+BATCH_WORKERS = 6  # Parallel connections used by submit_batch
+
+# One pooled session so submissions reuse keep-alive connections to the backend
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
 def submit_form(name, story, doc_type, aadhaar_number, pan_number, user_id,
                 id_img, selfie_img, supporting_doc, aadhaar_doc, pan_doc):
 
+    # Gradio hands us file paths; the encoder streams them instead of buffering the body
     files = {
         "id_image": id_img,
         "selfie_image": selfie_img,
@@ -13,6 +26,9 @@ def submit_form(name, story, doc_type, aadhaar_number, pan_number, user_id,
         "aadhaar_doc": aadhaar_doc,
         "pan_doc": pan_doc
     }
+    missing = [field for field, path in files.items() if not path]
+    if missing:
+        return {"error": f"Missing files: {', '.join(missing)}"}
 
     data = {
         "name": name,
@@ -24,24 +40,48 @@ def submit_form(name, story, doc_type, aadhaar_number, pan_number, user_id,
     }
 
     try:
-        res = requests.post(f"{FLASK_URL}/submit", data=data, files=files)
+        with ExitStack() as stack:
+            fields = dict(data)
+            for field, path in files.items():
+                content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                fields[field] = (os.path.basename(path), stack.enter_context(open(path, "rb")), content_type)
+            m = MultipartEncoder(fields=fields)
+            res = SESSION.post(f"{FLASK_URL}/submit", data=m, headers={"Content-Type": m.content_type})
         if res.status_code == 200:
             return res.json()
+        elif res.status_code == 202:
+            # Queued (TRUST_ASYNC_JOBS=1): the payload carries the job and record ids
+            queued = res.json()
+            return {
+                "message": queued.get("message", "Submission queued for verification"),
+                "status": queued.get("status", "pending"),
+                "record_id": queued.get("record_id"),
+                "job_id": queued.get("job_id"),
+                "status_url": f"{FLASK_URL}{queued['status_url']}" if queued.get("status_url") else None
+            }
         else:
             return {"error": f"Status {res.status_code}: {res.text}"}
     except Exception as e:
         return {"error": str(e)}
 
+def submit_batch(cases):
+    """
+    Submit many cases in parallel (bulk import). Each case is a tuple of
+    submit_form arguments; results come back in the same order.
+    """
+    with ThreadPoolExecutor(BATCH_WORKERS) as ex:
+        return list(ex.map(lambda case: submit_form(*case), cases))
+
 def get_records():
     try:
-        res = requests.get(f"{FLASK_URL}/records")
+        res = SESSION.get(f"{FLASK_URL}/records")
         if res.status_code == 200:
             records = res.json().get("records", [])
             if not records:
                 return "No records found."
             table = ""
             for r in records:
-                table += f"ID: {r['id']}, Name: {r['name']}, Trust Score: {r['trust_score']}, Story Score: {r['emotion_score']}\n"
+                table += f"ID: {r['id']}, Name: {r['name']}, Trust Score: {r['trust_score']}, Story Score: {r['emotion_score']}, Status: {r.get('status', 'completed')}\n"
             return table
         else:
             return f"Status {res.status_code}: {res.text}"
@@ -60,11 +100,11 @@ with gr.Blocks() as demo:
         doc_type = gr.Textbox(label="Supporting Document Type (e.g., license, certificate)")
         aadhaar_number = gr.Textbox(label="Aadhaar Number")
         pan_number = gr.Textbox(label="PAN Number")
-        id_img = gr.File(label="ID Image", type="file")
-        selfie_img = gr.File(label="Selfie Image", type="file")
-        supporting_doc = gr.File(label="Supporting Document (PDF)", type="file")
-        aadhaar_doc = gr.File(label="Aadhaar Card Image", type="file")
-        pan_doc = gr.File(label="PAN Card Image", type="file")
+        id_img = gr.File(label="ID Image", type="filepath")
+        selfie_img = gr.File(label="Selfie Image", type="filepath")
+        supporting_doc = gr.File(label="Supporting Document (PDF)", type="filepath")
+        aadhaar_doc = gr.File(label="Aadhaar Card Image", type="filepath")
+        pan_doc = gr.File(label="PAN Card Image", type="filepath")
 
         submit_btn = gr.Button("Submit for Verification")
         output = gr.JSON(label="Result")
@@ -81,4 +121,6 @@ with gr.Blocks() as demo:
         records_output = gr.Textbox(label="All Records", lines=10)
         view_btn.click(get_records, inputs=None, outputs=records_output)
 
-demo.launch(server_name="0.0.0.0", server_port=7860)
+# Guarded so bulk-import scripts can import submit_batch without starting the UI
+if __name__ == "__main__":
+    demo.launch(server_name="0.0.0.0", server_port=7860)
@@ -0,0 +1,42 @@
+# gunicorn.conf.py
+import os
+import multiprocessing
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+# One process per core (override with WEB_CONCURRENCY); inference runs in parallel across them
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# gthread by default: verification runs in real threads, which gevent's monkey-patching
+# would turn into greenlets sharing one core. Set GUNICORN_WORKER_CLASS=gevent (and
+# install gevent) for deployments dominated by slow uploads rather than inference.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_connections = 200  # Used by gevent workers only
+
+# Load the model weights once in the master; workers share them copy-on-write.
+# On GPU hosts set GUNICORN_PRELOAD=0: a CUDA context created in the master
+# does not survive the fork, so each worker has to initialize its own.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+if preload_app:
+    # TensorFlow/torch thread pools don't survive a fork, so the master only loads
+    # the weights and each worker runs the warm-up inference itself (post_fork)
+    os.environ.setdefault("TRUST_WARMUP_AFTER_FORK", "1")
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import app, db, warmup_worker
+        # The master's pooled DB connections (wsgi.py's create_all) must not be used
+        # across the fork; drop them without closing the master's copies
+        with app.app_context():
+            db.engine.dispose(close=False)
+        warmup_worker()
+
+def post_worker_init(worker):
+    # Workers (not the master, Celery or CLI commands) run the upload sweeper;
+    # a lock file makes sure only one of them sweeps at a time
+    from app import start_upload_sweeper
+    start_upload_sweeper()
+
+# Model inference on large uploads can take a while
+timeout = 120
@@ -1,5 +1,41 @@
+from sqlalchemy import inspect, text
 from app import app, db
+from models import TrustScoreRecord
+
+# Values given to existing rows when a NOT NULL column is added to them
+COLUMN_BACKFILLS = {
+    'status': "'completed'"
+}
+
+# Add model columns missing from an existing table (create_all() never alters tables).
+# Returns the names of the columns that were added.
+def migrate_columns(engine):
+    table = TrustScoreRecord.__table__
+    existing = {column['name'] for column in inspect(engine).get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            if column.name in COLUMN_BACKFILLS:
+                ddl += f" NOT NULL DEFAULT {COLUMN_BACKFILLS[column.name]}"
+            conn.execute(text(ddl))
+            added.append(column.name)
+        if 'content_hash' in added:
+            # The table predates the (user_id, content_hash) constraint; old rows have NULL hashes
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS uq_trust_user_content_hash "
+                f"ON {table.name} (user_id, content_hash)"
+            ))
+    return added
 
 with app.app_context():
     db.create_all()
+    added = migrate_columns(db.engine)
+    if added:
+        print(f"✅ Added columns: {', '.join(added)}")
+    # create_all() skips tables that already exist, so add any missing indexes too
+    for index in TrustScoreRecord.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
     print("✅ Database created")
@@ -1,11 +1,34 @@
 # models.py
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# SQLite tuning: WAL lets readers run alongside the writer and
+# synchronous=NORMAL drops the per-commit fsync to checkpoint time.
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 class TrustScoreRecord(db.Model):
     __tablename__ = 'trust_score_records'
+    __table_args__ = (
+        # One stored result per user per identical submission (see content_hash)
+        db.UniqueConstraint('user_id', 'content_hash', name='uq_trust_user_content_hash'),
+        # Lookups by user and date-ordered listings
+        db.Index('ix_trust_user_id', 'user_id'),
+        db.Index('ix_trust_created_at', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(50), nullable=False)
@@ -19,6 +42,9 @@ class TrustScoreRecord(db.Model):
     emotion_score = db.Column(db.Float, default=0.0)
     engagement_score = db.Column(db.Float, default=0.0)
     admin_adjustment = db.Column(db.Float, default=0.0)
+    # Raw sub-scores kept so trust_score can be recomputed without re-verifying
+    face_score = db.Column(db.Float)
+    story_score = db.Column(db.Float)
 
     # Image Paths
     id_image_path = db.Column(db.String(255))
@@ -37,11 +63,44 @@ class TrustScoreRecord(db.Model):
     supporting_doc_path = db.Column(db.String(255))
     supporting_doc_score = db.Column(db.Integer, default=0)
 
+    # pending (queued for verification), completed or failed
+    status = db.Column(db.String(20), nullable=False, default='completed')
+    # When the row was last queued; pending rows older than the cutoff are re-queued
+    queued_at = db.Column(db.DateTime)
+
+    # BLAKE3 hex digest of the form fields + uploaded files, used to skip re-verifying duplicates
+    content_hash = db.Column(db.String(64))
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
         return f"<TrustScoreRecord {self.user_id} - Score: {self.trust_score}>"
 
+def bulk_insert_records(rows):
+    """Insert many TrustScoreRecord rows (list of dicts) with a single commit."""
+    if not rows:
+        return
+    # executemany of one cached INSERT statement
+    db.session.execute(insert(TrustScoreRecord), rows)
+    db.session.commit()
+
+def bulk_update_records(mappings):
+    """Apply many {"id": ..., <column>: ...} updates with a single commit."""
+    if not mappings:
+        return
+    db.session.bulk_update_mappings(TrustScoreRecord, mappings)
+    db.session.commit()
+
+def mark_records_failed(record_ids):
+    """Mark pending records as failed (their job errored or its result was lost)."""
+    if not record_ids:
+        return
+    TrustScoreRecord.query.filter(
+        TrustScoreRecord.id.in_(record_ids),
+        TrustScoreRecord.status == 'pending'
+    ).update({'status': 'failed'}, synchronize_session=False)
+    db.session.commit()
+
 # from flask_sqlalchemy import SQLAlchemy
 # from datetime import datetime
 
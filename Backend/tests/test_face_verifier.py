@@ -0,0 +1,23 @@
+# tests/test_face_verifier.py
+import unittest
+from verifier.face_verifier import validate_aadhaar_format, validate_pan
+
+class AadhaarFormatTest(unittest.TestCase):
+    def test_valid_number(self):
+        self.assertTrue(validate_aadhaar_format("234123412346"))
+
+    def test_bad_checksum(self):
+        self.assertFalse(validate_aadhaar_format("234123412345"))
+
+    def test_non_ascii_digits_rejected(self):
+        # OCR output can contain Arabic-Indic (or Devanagari) digits
+        self.assertFalse(validate_aadhaar_format("١٢٣٤٥٦٧٨٩٠١٢"))
+        self.assertFalse(validate_aadhaar_format("२३४१२३४१२३४६"))
+
+class PanFormatTest(unittest.TestCase):
+    def test_pan(self):
+        self.assertTrue(validate_pan("ABCDE1234F"))
+        self.assertFalse(validate_pan("ABCDE12345"))
+
+if __name__ == "__main__":
+    unittest.main()
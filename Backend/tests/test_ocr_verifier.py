@@ -0,0 +1,32 @@
+# tests/test_ocr_verifier.py
+import unittest
+from unittest.mock import patch
+from verifier import ocr_verifier
+from verifier.ocr_verifier import score_supporting_document
+
+class SupportingDocumentScoreTest(unittest.TestCase):
+    def test_matches_keywords(self):
+        text = "admission receipt for the semester at the university"
+        # 4 of 6 keywords, weight 20
+        self.assertEqual(score_supporting_document(text, "education"), 13)
+
+    def test_overlapping_keywords(self):
+        # "fee" is a prefix of "feedback" and "receipt" overlaps "receipts"
+        doc_types = {"test": {"keywords": ["fee", "feedback", "receipt", "receipts"], "score_weight": 20}}
+        with patch.dict(ocr_verifier.SUPPORTING_DOCUMENT_TYPES, doc_types):
+            self.assertEqual(score_supporting_document("feedback on receipts", "test"), 20)
+            self.assertEqual(score_supporting_document("fee receipt", "test"), 10)
+
+    def test_find_keywords_substring_fallback(self):
+        # Without pyahocorasick the same matches come from one `in` check per keyword
+        with patch.object(ocr_verifier, "ahocorasick", None):
+            self.assertEqual(
+                ocr_verifier.find_keywords("feedback on receipts", ["fee", "feedback", "receipt", "receipts"]),
+                ["fee", "feedback", "receipt", "receipts"]
+            )
+
+    def test_unknown_doc_type(self):
+        self.assertEqual(score_supporting_document("anything", "unknown"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+# verifier/_ocr_cache.py
+import os
+import hashlib
+from functools import lru_cache
+from verifier.cache import BoundedCache
+
+# Extracted Aadhaar/PAN/supporting-document text is PII, so it is only kept in
+# memory (per process, bounded) and never written to disk
+OCR_CACHE_SIZE = int(os.environ.get("TRUST_OCR_CACHE_SIZE", "256"))
+
+class ExtractionCache:
+    """
+    In-memory LRU of OCR output, keyed by the SHA-256 of the file bytes plus the
+    OCR backend/settings name. Holds at most `max_size` texts.
+    """
+    def __init__(self, max_size: int = OCR_CACHE_SIZE):
+        self._texts = BoundedCache(max_size=max_size)
+
+    @staticmethod
+    def key(data: bytes, backend: str) -> str:
+        return f"{hashlib.sha256(data).hexdigest()}-{backend}"
+
+    def get(self, key: str):
+        """Cached text for `key`, or None on a miss."""
+        return self._texts.get(key)
+
+    def put(self, key: str, text: str) -> None:
+        self._texts.put(key, text)
+
+@lru_cache(maxsize=1)
+def get_ocr_cache() -> ExtractionCache:
+    return ExtractionCache()
@@ -0,0 +1,74 @@
+# verifier/batching.py
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Coalesces single-item calls from concurrent requests into one batched call.
+
+    `batch_fn` takes a list of inputs and returns a list of outputs in the same order.
+    A background thread waits for the first item, then keeps collecting until it has
+    `max_batch` items or `max_wait` seconds have passed, and runs one batch.
+    """
+    def __init__(self, batch_fn, max_batch: int = 16, max_wait: float = 0.02, name: str = "micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def _ensure_worker(self):
+        # (Re)start the worker in this process; threads don't survive a gunicorn --preload fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, item) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _drain(self, q):
+        batch = [q.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = self._drain(q)
+            items = [item for item, _ in batch]
+            try:
+                outputs = self.batch_fn(items)
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(items)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -0,0 +1,29 @@
+# verifier/cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+class BoundedCache:
+    """Small thread-safe LRU map holding at most `max_size` entries."""
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+def text_cache_key(text: str) -> str:
+    """Content address for a piece of text (SHA-256 hex digest)."""
+    return hashlib.sha256(text.encode()).hexdigest()
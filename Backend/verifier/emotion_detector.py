@@ -1,24 +1,80 @@
 import logging
-from transformers import pipeline
+from functools import lru_cache
+from verifier.model_loader import load_text_pipeline
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load sentiment analysis pipeline once
-sentiment_analyzer = pipeline(
-	"sentiment-analysis",
-	model="distilbert-base-uncased-finetuned-sst-2-english"
-)
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+
+def get_sentiment_analyzer():
+	"""
+	Sentiment pipeline (PyTorch, or int8 ONNX with TRUST_MODEL_BACKEND=onnx),
+	loaded on first use and shared with the story verifier.
+	"""
+	return load_text_pipeline("sentiment-analysis", SENTIMENT_MODEL)
+
+# Batch size for a single batched forward pass
+SENTIMENT_BATCH_SIZE = 32
+
+# Stories shorter than this (after stripping) skip the model and get a neutral score
+MIN_EMOTION_TEXT_LENGTH = 20
+DEFAULT_EMOTION_SCORE = 0.5
+SHORT_TEXT_SENTIMENT = {"label": "NEUTRAL", "score": DEFAULT_EMOTION_SCORE}
+# Comfortably more than 512 tokens; the tokenizer does the exact truncation
+EMOTION_TEXT_LIMIT = 2000
+
+def analyze_sentiments(texts: list) -> list:
+	"""
+	Runs the sentiment pipeline over many texts in one batched call.
+	The tokenizer truncates to the model's 512-token limit.
+	"""
+	return get_sentiment_analyzer()(
+		texts,
+		batch_size=SENTIMENT_BATCH_SIZE,
+		truncation=True,
+		max_length=512
+	)
+
+def detect_emotions(texts: list) -> list:
+	"""
+	Batched version of detect_emotion: one normalized score (0-1) per text.
+	"""
+	try:
+		return [round(result['score'], 2) for result in analyze_sentiments(texts)]
+	except Exception as e:
+		logger.error(f"Batched emotion detection failed: {e}")
+		return [0.0] * len(texts)
+
+def prepare_emotion_text(text: str):
+	"""
+	Returns the text the model should see (stripped, capped at EMOTION_TEXT_LIMIT chars),
+	or None if it is too short to be worth a model call.
+	"""
+	text = (text or "").strip()
+	if len(text) < MIN_EMOTION_TEXT_LENGTH:
+		return None
+	return text[:EMOTION_TEXT_LIMIT]
+
+# Keyed on the prepared prefix itself (see prepare_emotion_text)
+@lru_cache(maxsize=4096)
+def _detect_emotion_cached(text: str) -> float:
+	result = get_sentiment_analyzer()(text, truncation=True, max_length=512)[0]
+	score = result['score']
+	logger.info(f"Emotion detected: {result['label']} ({score})")
+	return round(score, 2)
 
 def detect_emotion(text: str) -> float:
 	"""
 	Returns a normalized emotion score (0-1) based on sentiment confidence.
+	Results are cached per story prefix, so resubmitted stories skip the model.
+	Near-empty stories return DEFAULT_EMOTION_SCORE without running it.
 	"""
+	prepared = prepare_emotion_text(text)
+	if prepared is None:
+		return DEFAULT_EMOTION_SCORE
 	try:
-		result = sentiment_analyzer(text[:512])[0]
-		score = result['score']
-		logger.info(f"Emotion detected: {result['label']} ({score})")
-		return round(score, 2)
+		return _detect_emotion_cached(prepared)
 	except Exception as e:
 		logger.error(f"Emotion detection failed: {e}")
 		return 0.0
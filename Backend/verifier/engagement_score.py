@@ -1,20 +1,37 @@
+import re
 import logging
+from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def calculate_engagement_score(story: str) -> float:
+# Engagement keywords (customize as needed)
+KEYWORDS = ("challenge", "achievement", "motivation", "impact", "community")
+_NUM_KW = len(KEYWORDS)
+# One case-insensitive pass over the story instead of lowercasing it and scanning per keyword
+KEYWORD_RE = re.compile("|".join(re.escape(kw) for kw in KEYWORDS), re.IGNORECASE)
+# Same pattern for text that was already casefolded by the caller
+KEYWORD_LOWER_RE = re.compile("|".join(re.escape(kw) for kw in KEYWORDS))
+
+# Story length (chars) is clamped to this range before scaling to 0-1
+_MIN_LEN = 100
+_MAX_LEN = 1000
+
+@lru_cache(maxsize=4096)
+def calculate_engagement_score(story: str, lower: str = None) -> float:
 	"""
 	Returns a normalized engagement score (0-1) based on story length and keyword presence.
+	Pass `lower` (the casefolded story) if the caller already has it.
+	Cached per story text.
 	"""
-	min_length = 100
-	max_length = 1000
-	length_score = min(max(len(story), min_length), max_length) / max_length
+	length_score = min(max(len(story), _MIN_LEN), _MAX_LEN) / _MAX_LEN
 
-	# Engagement keywords (customize as needed)
-	keywords = ["challenge", "achievement", "motivation", "impact", "community"]
-	keyword_hits = sum(1 for kw in keywords if kw.lower() in story.lower())
-	keyword_score = keyword_hits / len(keywords)
+	# Distinct keywords present in the story
+	if lower is not None:
+		keyword_hits = len(set(KEYWORD_LOWER_RE.findall(lower)))
+	else:
+		keyword_hits = len({match.lower() for match in KEYWORD_RE.findall(story)})
+	keyword_score = keyword_hits / _NUM_KW
 
 	# Weighted average
 	engagement_score = round(0.7 * length_score + 0.3 * keyword_score, 2)
@@ -1,13 +1,17 @@
 # verifier/face_verifier.py
+import io
 import logging
-import cv2
 import re
+import numpy as np
 import os
-from deepface import DeepFace
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding
+import hashlib
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
+from pathlib import Path
 import xml.etree.ElementTree as ET
-from verifier.ocr_verifier import extract_text  # OCR function for Aadhaar/PAN files
+from verifier.cache import BoundedCache
+from verifier.ocr_verifier import FileSource, extract_text, is_bytes, read_source, source_exists  # OCR function for Aadhaar/PAN files
 
 # -----------------------
 # Logging Setup
@@ -20,45 +24,128 @@ logger = logging.getLogger(__name__)
 # -----------------------
 MODEL_NAME = "SFace"
 DETECTOR_BACKEND = "retinaface"
-logger.info(f"Loading face recognition model: {MODEL_NAME}")
-model = DeepFace.build_model(MODEL_NAME)
-logger.info("Model loaded successfully.")
+# DeepFace's cosine-distance thresholds per model (what DeepFace.verify uses for "verified")
+VERIFY_THRESHOLDS = {
+    "VGG-Face": 0.68,
+    "Facenet": 0.40,
+    "Facenet512": 0.30,
+    "ArcFace": 0.68,
+    "Dlib": 0.07,
+    "SFace": 0.593,
+    "OpenFace": 0.10,
+    "DeepFace": 0.23,
+    "DeepID": 0.015,
+    "GhostFaceNet": 0.65,
+}
+# DeepFace's fallback for models it has no tuned threshold for
+DEFAULT_VERIFY_THRESHOLD = 0.4
+
+# TensorFlow, DeepFace, OpenCV and cryptography are imported on first use, so a
+# process that only needs the format validators doesn't pay for loading them
+
+def configure_gpu() -> bool:
+    """
+    Let TensorFlow grow GPU memory on demand (so it can share the card with torch)
+    instead of reserving all of it. Must run before the first TF op. Returns True
+    if DeepFace will run on a GPU.
+    """
+    import tensorflow as tf
+    gpus = tf.config.list_physical_devices("GPU")
+    for gpu in gpus:
+        try:
+            tf.config.experimental.set_memory_growth(gpu, True)
+        except RuntimeError as e:
+            logger.warning(f"Could not enable GPU memory growth: {e}")
+    logger.info(f"Face models running on {'GPU' if gpus else 'CPU'}.")
+    return bool(gpus)
+
+_gpu_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _deepface():
+    """Import DeepFace once, after configuring the GPU. Returns (DeepFace, whether on GPU)."""
+    use_gpu = configure_gpu()
+    from deepface import DeepFace
+    return DeepFace, use_gpu
+
+def _inference_lock():
+    # One GPU session shared by the verifier threads: serialize inference on it.
+    # On CPU the threads run in parallel (each pinned to its own core).
+    return _gpu_lock if _deepface()[1] else nullcontext()
+
+@lru_cache(maxsize=1)
+def get_face_model():
+    """Build the face recognition model once per process."""
+    logger.info(f"Loading face recognition model: {MODEL_NAME}")
+    face_model = _deepface()[0].build_model(MODEL_NAME)
+    logger.info("Model loaded successfully.")
+    return face_model
+
+def warmup(model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> None:
+    """
+    Load the face model, then run the detector + embedding model once on a blank
+    frame so the first request is warm. Call at startup, before any request thread exists.
+    """
+    try:
+        get_face_model()
+        dummy = np.zeros((224, 224, 3), dtype=np.uint8)
+        _deepface()[0].represent(img_path=dummy, model_name=model_name,
+                                 detector_backend=detector_backend, enforce_detection=False)
+        logger.info("Face models warmed up.")
+    except Exception as e:
+        logger.warning(f"Face model warmup failed: {e}")
 
 # -----------------------
 # Aadhaar & PAN Validators
 # -----------------------
+# ASCII digits only: verhoeff_checksum indexes its tables with ord(digit) - 48
+AADHAAR_RE = re.compile(r"[0-9]{12}")
+PAN_RE = re.compile(r"[A-Z]{5}[0-9]{4}[A-Z]")
+
+# Verhoeff multiplication and permutation tables, built once at import
+_VERHOEFF_D = (
+    (0,1,2,3,4,5,6,7,8,9),
+    (1,2,3,4,0,6,7,8,9,5),
+    (2,3,4,0,1,7,8,9,5,6),
+    (3,4,0,1,2,8,9,5,6,7),
+    (4,0,1,2,3,9,5,6,7,8),
+    (5,9,8,7,6,0,4,3,2,1),
+    (6,5,9,8,7,1,0,4,3,2),
+    (7,6,5,9,8,2,1,0,4,3),
+    (8,7,6,5,9,3,2,1,0,4),
+    (9,8,7,6,5,4,3,2,1,0)
+)
+_VERHOEFF_P = (
+    (0,1,2,3,4,5,6,7,8,9),
+    (1,5,7,6,2,8,3,0,9,4),
+    (5,8,0,3,7,9,6,1,4,2),
+    (8,9,1,6,0,4,3,5,2,7),
+    (9,4,5,3,1,2,6,8,7,0),
+    (4,2,8,6,5,7,3,9,0,1),
+    (2,7,9,3,8,0,6,4,1,5),
+    (7,0,4,6,9,1,3,2,5,8)
+)
+
+def verhoeff_checksum(num: str) -> bool:
+    """Verhoeff check over a string of ASCII digits (validate the format first)."""
+    c = 0
+    for i, digit in enumerate(reversed(num)):
+        c = _VERHOEFF_D[c][_VERHOEFF_P[i & 7][ord(digit) - 48]]
+    return c == 0
+
 def validate_aadhaar_format(aadhaar_number: str) -> bool:
     """Basic Aadhaar format + Verhoeff checksum"""
-    def verhoeff_checksum(num):
-        d_table = [
-            [0,1,2,3,4,5,6,7,8,9],
-            [1,2,3,4,0,6,7,8,9,5],
-            [2,3,4,0,1,7,8,9,5,6],
-            [3,4,0,1,2,8,9,5,6,7],
-            [4,0,1,2,3,9,5,6,7,8],
-            [5,9,8,7,6,0,4,3,2,1],
-            [6,5,9,8,7,1,0,4,3,2],
-            [7,6,5,9,8,2,1,0,4,3],
-            [8,7,6,5,9,3,2,1,0,4],
-            [9,8,7,6,5,4,3,2,1,0]
-        ]
-        p_table = [
-            [0,1,2,3,4,5,6,7,8,9],
-            [1,5,7,6,2,8,3,0,9,4],
-            [5,8,0,3,7,9,6,1,4,2],
-            [8,9,1,6,0,4,3,5,2,7],
-            [9,4,5,3,1,2,6,8,7,0],
-            [4,2,8,6,5,7,3,9,0,1],
-            [2,7,9,3,8,0,6,4,1,5],
-            [7,0,4,6,9,1,3,2,5,8]
-        ]
-        c = 0
-        num = num[::-1]
-        for i in range(len(num)):
-            c = d_table[c][p_table[i % 8][int(num[i])]]
-        return c == 0
-
-    return bool(re.fullmatch(r"\d{12}", aadhaar_number)) and verhoeff_checksum(aadhaar_number)
+    return bool(AADHAAR_RE.fullmatch(aadhaar_number)) and verhoeff_checksum(aadhaar_number)
+
+# Offline verification results keyed by (sha256(xml), sha256(public key)), so a
+# repeat applicant skips the XML parse and RSA verify
+_offline_results = BoundedCache(max_size=1024)
+
+@lru_cache(maxsize=8)
+def _load_public_key(key_hash: str, key_bytes: bytes):
+    """Parse the UIDAI PEM once per key file content."""
+    from cryptography.hazmat.primitives import serialization
+    return serialization.load_pem_public_key(key_bytes)
 
 def verify_aadhaar_offline(xml_or_pdf_path: str, uidai_public_key_path: str) -> bool:
     """Offline Aadhaar XML/QR verification using UIDAI's public key."""
@@ -67,8 +154,26 @@ def verify_aadhaar_offline(xml_or_pdf_path: str, uidai_public_key_path: str) ->
         return False
 
     try:
-        tree = ET.parse(xml_or_pdf_path)
-        root = tree.getroot()
+        xml_bytes = Path(xml_or_pdf_path).read_bytes()
+        key_bytes = Path(uidai_public_key_path).read_bytes()
+    except OSError as e:
+        logger.warning(f"Offline Aadhaar verification failed: {e}")
+        return False
+
+    key_hash = hashlib.sha256(key_bytes).hexdigest()
+    cache_key = (hashlib.sha256(xml_bytes).hexdigest(), key_hash)
+    result = _offline_results.get(cache_key)
+    if result is None:
+        result = _verify_aadhaar_signature(xml_bytes, key_hash, key_bytes)
+        _offline_results.put(cache_key, result)
+    return result
+
+def _verify_aadhaar_signature(xml_bytes: bytes, key_hash: str, key_bytes: bytes) -> bool:
+    """Check the UIDAI RSA-SHA256 signature over the XML `data` attribute."""
+    try:
+        # Both attributes sit on the root element: stop at its start tag
+        # instead of building the whole tree
+        _, root = next(ET.iterparse(io.BytesIO(xml_bytes), events=("start",)))
         signature = root.attrib.get('signature')
         data = root.attrib.get('data')
 
@@ -76,8 +181,9 @@ def verify_aadhaar_offline(xml_or_pdf_path: str, uidai_public_key_path: str) ->
             logger.warning("Signature or data not found in Aadhaar XML.")
             return False
 
-        with open(uidai_public_key_path, "rb") as key_file:
-            public_key = serialization.load_pem_public_key(key_file.read())
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        public_key = _load_public_key(key_hash, key_bytes)
 
         public_key.verify(
             bytes.fromhex(signature),
@@ -93,19 +199,92 @@ def verify_aadhaar_offline(xml_or_pdf_path: str, uidai_public_key_path: str) ->
         return False
 
 def validate_pan(pan_number: str) -> bool:
-    return bool(re.fullmatch(r"[A-Z]{5}[0-9]{4}[A-Z]", pan_number))
+    return bool(PAN_RE.fullmatch(pan_number))
+
+def load_image(source: FileSource):
+    """Decode an image from a file path or raw bytes into a BGR array (None if unreadable)."""
+    import cv2
+    if is_bytes(source):
+        return cv2.imdecode(np.frombuffer(source, np.uint8), cv2.IMREAD_COLOR)
+    return cv2.imread(source)
+
+# -----------------------
+# Embeddings
+# -----------------------
+# ID embeddings keyed by (sha256(ID image), model, detector): re-verifying an
+# applicant skips detection + embedding of their ID
+_id_embeddings = BoundedCache(max_size=1024)
+
+def l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize one embedding (d,) or a stack of them (N, d) as float32."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.maximum(norms, np.finfo(np.float32).eps)
+
+def embed_face(image, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND):
+    """
+    Detect, align and embed the most confident face in a BGR image in one pass.
+    Returns (L2-normalized float32 embedding, detector face_confidence);
+    raises ValueError if no face is found.
+    """
+    DeepFace = _deepface()[0]
+    with _inference_lock():
+        faces = DeepFace.represent(img_path=image, model_name=model_name,
+                                   detector_backend=detector_backend, enforce_detection=True)
+    face = max(faces, key=lambda f: f.get("face_confidence", 0))
+    return l2_normalize(face["embedding"]), face.get("face_confidence", 0)
+
+def cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine distance between two L2-normalized embeddings."""
+    return float(1 - np.dot(a, b))
+
+def build_gallery(embeddings) -> np.ndarray:
+    """Stack embeddings into an (N, d) float32 gallery, normalized once up front."""
+    return np.ascontiguousarray(l2_normalize(np.vstack(embeddings)))
+
+def gallery_distances(gallery: np.ndarray, embedding: np.ndarray) -> np.ndarray:
+    """
+    Cosine distance from one normalized embedding to every row of a gallery
+    (see build_gallery): a single BLAS matrix-vector product.
+    """
+    return 1 - gallery @ embedding
+
+def quantize_embeddings(embeddings: np.ndarray):
+    """
+    Symmetric int8 quantization of normalized embedding(s), one scale per embedding:
+    returns (int8 values, float32 scales) with embedding ~= values / scale.
+    A quarter of the float32 size, for storing or scanning large galleries.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    max_abs = np.max(np.abs(embeddings), axis=-1, keepdims=True)
+    scales = 127 / np.maximum(max_abs, np.finfo(np.float32).eps)
+    values = np.round(embeddings * scales).astype(np.int8)
+    return values, np.squeeze(scales, axis=-1).astype(np.float32)
+
+def quantized_gallery_distances(gallery_values: np.ndarray, gallery_scales: np.ndarray,
+                                values: np.ndarray, scale) -> np.ndarray:
+    """
+    gallery_distances on int8 data (see quantize_embeddings). Dot products are
+    accumulated in int32 without materializing a widened copy of the gallery.
+    """
+    dots = np.einsum("nd,d->n", gallery_values, values, dtype=np.int32, casting="unsafe")
+    return 1 - dots / (gallery_scales * scale)
 
 # -----------------------
 # Real Liveness Detection
 # -----------------------
-def liveness_check(image_path: str, backend: str = DETECTOR_BACKEND) -> float:
+def liveness_check(image_path, backend: str = DETECTOR_BACKEND) -> float:
     """
-    Returns a normalized liveness score (0-1) using DeepFace's confidence.
+    Returns a normalized liveness score (0-1) using DeepFace's detector confidence.
+    Only runs face detection (no emotion model). verify_face takes the confidence
+    from its embedding pass instead; this is kept for standalone checks.
     """
     try:
         logger.info("Running liveness detection using DeepFace confidence score...")
-        result = DeepFace.analyze(img_path=image_path, actions=['emotion'], detector_backend=backend)
-        confidence = result[0].get("face_confidence", 0)
+        DeepFace = _deepface()[0]
+        with _inference_lock():
+            faces = DeepFace.extract_faces(img_path=image_path, detector_backend=backend, enforce_detection=False)
+        confidence = max((face.get("confidence", 0) for face in faces), default=0)
         logger.info(f"Liveness confidence: {confidence}")
         # Normalize confidence (assuming max 1.0)
         return min(max(confidence, 0), 1)
@@ -116,13 +295,14 @@ def liveness_check(image_path: str, backend: str = DETECTOR_BACKEND) -> float:
 # -----------------------
 # Face Verification Logic
 # -----------------------
-def verify_face(id_img_path: str, selfie_path: str, aadhaar_number: str, pan_number: str,
-                aadhaar_file_path: str = None, pan_file_path: str = None,
+def verify_face(id_img_path: FileSource, selfie_path: FileSource, aadhaar_number: str, pan_number: str,
+                aadhaar_file_path: FileSource = None, pan_file_path: FileSource = None,
                 aadhaar_xml_path: str = None, uidai_public_key_path: str = None,
                 model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND,
                 face_threshold: float = 0.4) -> dict:
     """
     Verifies face match + Aadhaar/PAN + optional Aadhaar offline verification + OCR match.
+    Image/document arguments accept either a file path or the raw file bytes.
     Returns detailed trust breakdown and total score out of 20.
     """
     trust_score = 0
@@ -136,24 +316,30 @@ def verify_face(id_img_path: str, selfie_path: str, aadhaar_number: str, pan_num
     }
 
     try:
+        # Each image is decoded at most once (and the ID not at all when its
+        # embedding is cached); bail out before decoding the selfie if the ID is unusable
         logger.info("Reading ID and Selfie images...")
-        id_img = cv2.imread(id_img_path)
-        selfie_img = cv2.imread(selfie_path)
-        if id_img is None or selfie_img is None:
+        try:
+            id_bytes = read_source(id_img_path)
+        except OSError:
+            id_bytes = b""
+        id_key = (hashlib.sha256(id_bytes).hexdigest(), model_name, detector_backend)
+        id_embedding = _id_embeddings.get(id_key) if id_bytes else None
+        id_img = load_image(id_bytes) if id_bytes and id_embedding is None else None
+        selfie_img = load_image(selfie_path) if id_embedding is not None or id_img is not None else None
+        if selfie_img is None:
             logger.warning("❌ One or both images could not be loaded.")
             return result_breakdown
 
-        logger.info("Running DeepFace verification...")
-        result = DeepFace.verify(
-            img1_path=id_img_path,
-            img2_path=selfie_path,
-            model_name=model_name,
-            detector_backend=detector_backend,
-            enforce_detection=True
-        )
+        # One detect + align + embed pass per image; the ID's is reused across calls
+        logger.info("Running DeepFace embedding + comparison...")
+        if id_embedding is None:
+            id_embedding, _ = embed_face(id_img, model_name, detector_backend)
+            _id_embeddings.put(id_key, id_embedding)
+        selfie_embedding, selfie_confidence = embed_face(selfie_img, model_name, detector_backend)
 
-        verified = result.get("verified", False)
-        distance = result.get("distance", 1.0)
+        distance = cosine_distance(id_embedding, selfie_embedding)
+        verified = distance <= VERIFY_THRESHOLDS.get(model_name, DEFAULT_VERIFY_THRESHOLD)
         threshold = face_threshold
         logger.info(f"✅ Match Result: verified={verified}, distance={distance:.4f}, threshold={threshold:.4f}")
         result_breakdown["details"]["distance"] = distance
@@ -167,8 +353,9 @@ def verify_face(id_img_path: str, selfie_path: str, aadhaar_number: str, pan_num
         else:
             result_breakdown["face_match_score"] = 0.0
 
-        # Liveness normalized
-        liveness = liveness_check(selfie_path, backend=detector_backend)
+        # Liveness normalized (detector confidence from the selfie's embedding pass)
+        liveness = min(max(selfie_confidence, 0), 1)
+        logger.info(f"Liveness confidence: {liveness}")
         result_breakdown["liveness_score"] = liveness
         result_breakdown["details"]["liveness_confidence"] = liveness
 
@@ -179,7 +366,7 @@ def verify_face(id_img_path: str, selfie_path: str, aadhaar_number: str, pan_num
             offline_verified = verify_aadhaar_offline(aadhaar_xml_path, uidai_public_key_path)
 
         if basic_aadhaar_valid and (offline_verified or not aadhaar_xml_path):
-            if aadhaar_file_path and os.path.exists(aadhaar_file_path):
+            if aadhaar_file_path is not None and source_exists(aadhaar_file_path):
                 text = extract_text(aadhaar_file_path)
                 if aadhaar_number in text:
                     result_breakdown["aadhaar_valid"] = True
@@ -192,8 +379,9 @@ def verify_face(id_img_path: str, selfie_path: str, aadhaar_number: str, pan_num
         result_breakdown["details"]["aadhaar_offline_verified"] = offline_verified
 
         # PAN validation (regex + OCR match if file uploaded)
-        if validate_pan(pan_number):
-            if pan_file_path and os.path.exists(pan_file_path):
+        pan_format_valid = validate_pan(pan_number)
+        if pan_format_valid:
+            if pan_file_path is not None and source_exists(pan_file_path):
                 text = extract_text(pan_file_path)
                 if pan_number in text:
                     result_breakdown["pan_valid"] = True
@@ -202,7 +390,7 @@ def verify_face(id_img_path: str, selfie_path: str, aadhaar_number: str, pan_num
                     logger.warning("❌ PAN number not found in uploaded PAN file.")
             else:
                 result_breakdown["pan_valid"] = True
-        result_breakdown["details"]["pan_format_valid"] = validate_pan(pan_number)
+        result_breakdown["details"]["pan_format_valid"] = pan_format_valid
 
         # Final trust score (normalized, out of 1)
         trust_score = (
@@ -0,0 +1,95 @@
+# verifier/model_loader.py
+import os
+import logging
+import threading
+from functools import lru_cache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "torch" (default) or "onnx" (ONNX Runtime, dynamic int8 quantized; needs optimum[onnxruntime])
+MODEL_BACKEND = os.environ.get("TRUST_MODEL_BACKEND", "torch").lower()
+ONNX_CACHE_DIR = os.environ.get(
+    "TRUST_ONNX_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "trust_score_onnx")
+)
+
+@lru_cache(maxsize=1)
+def configure_torch() -> None:
+    """
+    Pin torch to the per-worker thread count (OMP_NUM_THREADS, set by app.py) before
+    the first model loads. A no-op when torch isn't installed (e.g. ONNX-only deployments).
+    """
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(int(os.environ.get("OMP_NUM_THREADS") or os.cpu_count() or 1))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already set, or inter-op work has started
+        pass
+    # is_available() doesn't create a CUDA context, so this is safe before a fork
+    if torch.cuda.is_available():
+        torch.backends.cudnn.benchmark = True
+
+def _load_onnx_pipeline(task: str, model_name: str):
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+
+    quantized_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "__"))
+    if not os.path.isdir(quantized_dir):
+        # One-time export + dynamic int8 quantization, cached on disk
+        logger.info(f"Exporting {model_name} to ONNX and quantizing to int8...")
+        onnx_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        quantizer = ORTQuantizer.from_pretrained(onnx_model)
+        quantizer.quantize(
+            save_dir=quantized_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        )
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(quantized_dir)
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Respect the per-worker thread pinning done by app.py (OMP_NUM_THREADS)
+    session_options.intra_op_num_threads = int(os.environ.get("OMP_NUM_THREADS") or os.cpu_count() or 1)
+    model = ORTModelForSequenceClassification.from_pretrained(
+        quantized_dir,
+        file_name="model_quantized.onnx",
+        provider="CPUExecutionProvider",
+        session_options=session_options
+    )
+    tokenizer = AutoTokenizer.from_pretrained(quantized_dir)
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+# Loaded pipelines keyed by (task, model): every caller shares one copy of each model
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def load_text_pipeline(task: str, model_name: str):
+    """
+    Loads a Hugging Face sequence-classification pipeline (sentiment, zero-shot NLI, ...)
+    on the configured backend, once per process.
+    Falls back to the PyTorch pipeline if the ONNX backend is unavailable.
+    """
+    with _pipelines_lock:
+        key = (task, model_name)
+        if key not in _pipelines:
+            _pipelines[key] = _load_text_pipeline(task, model_name)
+        return _pipelines[key]
+
+def _load_text_pipeline(task: str, model_name: str):
+    configure_torch()
+    if MODEL_BACKEND == "onnx":
+        try:
+            text_pipeline = _load_onnx_pipeline(task, model_name)
+            logger.info(f"Loaded {model_name} on ONNX Runtime (int8).")
+            return text_pipeline
+        except Exception as e:
+            logger.warning(f"ONNX backend unavailable for {model_name}, using PyTorch: {e}")
+    # transformers (and torch) are only imported once a model is actually needed
+    from transformers import pipeline
+    return pipeline(task, model=model_name)
@@ -0,0 +1,80 @@
+# verifier/nlp_scores.py
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from verifier.batching import MicroBatcher
+from verifier.emotion_detector import (
+    SHORT_TEXT_SENTIMENT,
+    analyze_sentiments,
+    prepare_emotion_text,
+)
+from verifier.engagement_score import calculate_engagement_score
+from verifier.story_nlp import StoryNLPVerifier
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ScoreBundle = namedtuple("ScoreBundle", ["emotion_score", "engagement_score", "story_score"])
+PreparedStory = namedtuple("PreparedStory", ["text", "lower", "trimmed"])
+
+# Models load on first use; load_text_pipeline hands the story verifier the
+# emotion detector's sentiment pipeline instead of loading DistilBERT twice
+story_verifier = StoryNLPVerifier()
+
+# Sentiment calls from concurrent submissions are run as one batched forward pass
+sentiment_batcher = MicroBatcher(
+    analyze_sentiments,
+    max_batch=16,
+    max_wait=0.02,
+    name="sentiment-batcher"
+)
+# BART-MNLI is the most expensive model per story, so batch it the same way
+authenticity_batcher = MicroBatcher(
+    story_verifier.check_authenticity_batch,
+    max_batch=8,
+    max_wait=0.02,
+    name="authenticity-batcher"
+)
+story_verifier.authenticity_fn = authenticity_batcher
+
+@lru_cache(maxsize=4096)
+def _sentiment(prefix: str) -> dict:
+    # Keyed on the prepared prefix, so stories that only differ past it share a result
+    return sentiment_batcher(prefix)
+
+def preprocess_story(story: str) -> PreparedStory:
+    """Derive the casefolded and model-ready forms of a story once for all scorers."""
+    return PreparedStory(text=story, lower=story.casefold(), trimmed=prepare_emotion_text(story))
+
+def score_all(story: str) -> ScoreBundle:
+    """
+    Runs every story-based scorer with a single sentiment pass.
+    Not cached itself: sentiment, engagement and story scores each have their own
+    cache, and a failed sentiment pass here must not stick to the story.
+    """
+    prepared = preprocess_story(story)
+    try:
+        prefix = prepared.trimmed
+        # Near-empty stories skip the model and get a neutral result
+        sentiment = SHORT_TEXT_SENTIMENT if prefix is None else _sentiment(prefix)
+        emotion_score = round(sentiment['score'], 2)
+        logger.info(f"Emotion detected: {sentiment['label']} ({sentiment['score']})")
+    except Exception as e:
+        logger.error(f"Emotion detection failed: {e}")
+        sentiment = None
+        emotion_score = 0.0
+
+    engagement_score = calculate_engagement_score(story, prepared.lower)
+    story_score = story_verifier.score_story(story, sentiment=sentiment, lower=prepared.lower)
+    return ScoreBundle(emotion_score, engagement_score, story_score)
+
+def load_models() -> None:
+    """Load the sentiment and story pipelines without running them."""
+    story_verifier.sentiment_analyzer
+    story_verifier.auth_classifier
+
+def warmup() -> None:
+    """Load and run the sentiment and story pipelines so the first real request doesn't pay for it."""
+    logger.info("Warming up NLP models...")
+    score_all("Warming up the sentiment and story models.")
+    logger.info("NLP models ready.")
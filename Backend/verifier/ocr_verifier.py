@@ -1,11 +1,21 @@
 # verifier/ocr_verifier.py
 
+import io
 import os
 import logging
-import pytesseract
-from PIL import Image
-from pdf2image import convert_from_path
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Union
+from verifier._ocr_cache import ExtractionCache, get_ocr_cache
+
+try:
+    import ahocorasick
+except ImportError:
+    # Optional (pyahocorasick); keywords are then checked one substring at a time
+    ahocorasick = None
+
+# Verifier inputs can be a file path or the raw file bytes already in memory
+FileSource = Union[str, bytes]
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -27,21 +37,125 @@ SUPPORTING_DOCUMENT_TYPES = {
     }
 }
 
-def is_pdf(file_path: str) -> bool:
-    return file_path.lower().endswith('.pdf')
+@lru_cache(maxsize=None)
+def keyword_automaton(keywords: tuple):
+    """Aho-Corasick automaton over the lowercased keywords of one document type."""
+    automaton = ahocorasick.Automaton()
+    for kw in keywords:
+        automaton.add_word(kw.lower(), kw.lower())
+    automaton.make_automaton()
+    return automaton
+
+def find_keywords(text: str, keywords) -> list:
+    """
+    Keywords (in their configured order) that occur in the lowercased text. One
+    automaton pass reports every occurrence, overlapping and nested ones included,
+    so the result is the same as one `in` check per keyword.
+    """
+    if ahocorasick is None:
+        return [kw for kw in keywords if kw.lower() in text]
+    found = {word for _, word in keyword_automaton(tuple(keywords)).iter(text)}
+    return [kw for kw in keywords if kw.lower() in found]
+
+def warmup() -> None:
+    """Run Tesseract once on a blank image so its binary and language data are loaded."""
+    try:
+        import pytesseract
+        from PIL import Image
+        pytesseract.image_to_string(Image.new("RGB", (64, 64), "white"))
+        logger.info("OCR engine warmed up.")
+    except Exception as e:
+        logger.warning(f"OCR warmup failed: {e}")
+
+def is_bytes(source: FileSource) -> bool:
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+def source_exists(source: FileSource) -> bool:
+    if is_bytes(source):
+        return len(source) > 0
+    return bool(source) and os.path.exists(source)
+
+def describe_source(source: FileSource) -> str:
+    return f"<{len(source)} bytes in memory>" if is_bytes(source) else source
+
+PDF_MAGIC = b'%PDF-'
 
-def extract_text(file_path: str) -> str:
+def is_pdf(source: FileSource) -> bool:
+    """Sniff the PDF magic bytes; the file name says nothing about what was uploaded."""
+    if is_bytes(source):
+        return bytes(source[:5]) == PDF_MAGIC
     try:
-        if is_pdf(file_path):
-            logger.info("PDF detected. Converting to images for OCR...")
-            pages = convert_from_path(file_path, dpi=300)
-            full_text = ""
-            for page in pages:
-                full_text += pytesseract.image_to_string(page) + "\n"
-            return full_text.lower()
+        with open(source, 'rb') as f:
+            return f.read(5) == PDF_MAGIC
+    except OSError:
+        return False
+
+# Resolution scanned PDF pages are rendered at for OCR (TRUST_OCR_DPI). Lower values
+# render and OCR faster at the cost of accuracy on small print.
+OCR_DPI = int(os.environ.get("TRUST_OCR_DPI", "300"))
+# Part of the OCR cache key; change it when the OCR engine or settings change
+OCR_BACKEND = f"pypdf-tesseract-dpi{OCR_DPI}"
+# A PDF whose embedded text layer has fewer characters than this is treated as scanned
+MIN_PDF_TEXT_LENGTH = 50
+
+# PDF pages are OCR'd in parallel. pytesseract runs one tesseract process per page,
+# so threads are enough (the GIL is released while waiting on it).
+OCR_WORKERS = os.cpu_count() or 1
+OCR_EXECUTOR = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+def read_source(source: FileSource) -> bytes:
+    if is_bytes(source):
+        return bytes(source)
+    with open(source, 'rb') as f:
+        return f.read()
+
+def extract_pdf_text_layer(data: bytes) -> str:
+    """Text embedded in a digitally generated PDF ("" if there is none or it can't be read)."""
+    try:
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        logger.warning(f"PDF text extraction failed, falling back to OCR: {e}")
+        return ""
+
+def _run_ocr(data: bytes, pdf: bool) -> str:
+    # OCR libraries are imported on first use; cache hits never load them
+    import pytesseract
+    if pdf:
+        # Digital PDFs already carry their text; only scanned ones need OCR
+        text = extract_pdf_text_layer(data)
+        if len(text.strip()) >= MIN_PDF_TEXT_LENGTH:
+            logger.info("PDF text layer found. Skipping OCR.")
+            return text.lower()
+        logger.info("PDF detected. Converting to images for OCR...")
+        from pdf2image import convert_from_bytes
+        pages = convert_from_bytes(data, dpi=OCR_DPI, thread_count=OCR_WORKERS)
+        if len(pages) == 1:
+            texts = [pytesseract.image_to_string(pages[0])]
         else:
-            logger.info("Image detected. Using pytesseract directly.")
-            return pytesseract.image_to_string(Image.open(file_path)).lower()
+            texts = list(OCR_EXECUTOR.map(pytesseract.image_to_string, pages))
+        return "".join(text + "\n" for text in texts).lower()
+    logger.info("Image detected. Using pytesseract directly.")
+    from PIL import Image
+    return pytesseract.image_to_string(Image.open(io.BytesIO(data))).lower()
+
+def extract_text(source: FileSource) -> str:
+    """
+    OCR an image or PDF (path or bytes) to lowercase text.
+    Results are cached by file content, so repeat documents skip Tesseract.
+    """
+    try:
+        data = read_source(source)
+        cache = get_ocr_cache()
+        key = ExtractionCache.key(data, OCR_BACKEND)
+        text = cache.get(key)
+        if text is not None:
+            logger.info("OCR cache hit.")
+            return text
+        text = _run_ocr(data, is_pdf(data))
+        cache.put(key, text)
+        return text
     except Exception as e:
         logger.error(f"OCR extraction failed: {e}")
         return ""
@@ -52,28 +166,29 @@ def score_supporting_document(text: str, doc_type: str) -> int:
         return 0
 
     keywords = SUPPORTING_DOCUMENT_TYPES[doc_type]['keywords']
-    matched = [kw for kw in keywords if kw.lower() in text]
-    score = int((len(matched) / len(keywords)) * SUPPORTING_DOCUMENT_TYPES[doc_type]['score_weight'])
+    matched = find_keywords(text, keywords)
+    # Integer arithmetic: same truncated score without float rounding
+    score = len(matched) * SUPPORTING_DOCUMENT_TYPES[doc_type]['score_weight'] // len(keywords)
 
     logger.info(f"Matched keywords: {matched}")
     logger.info(f"Score breakdown: {len(matched)}/{len(keywords)} keywords matched.")
     return score
 
-def verify_supporting_document(path: str, doc_type: str = 'medical') -> int:
+def verify_supporting_document(path: FileSource, doc_type: str = 'medical') -> int:
     """
     Verifies authenticity of a supporting document (image or PDF) based on
     OCR-extracted text and keyword matching.
 
     Args:
-        path (str): Path to the file (image or PDF)
+        path (str | bytes): Path to the file (image or PDF), or its raw bytes
         doc_type (str): Type of supporting document ('medical', 'education', etc.)
 
     Returns:
         int: Score out of 20
     """
-    logger.info(f"Verifying supporting document: {path} as {doc_type}")
+    logger.info(f"Verifying supporting document: {describe_source(path)} as {doc_type}")
 
-    if not os.path.exists(path):
+    if not source_exists(path):
         logger.warning("Document not found.")
         return 0
 
@@ -1,23 +1,44 @@
 # verifier/story_nlp.py
 import re
+from functools import cached_property
 import textstat
-from transformers import pipeline
+from verifier.cache import BoundedCache, text_cache_key
+from verifier.model_loader import load_text_pipeline
 
 class StoryNLPVerifier:
-    def __init__(self):
-        # Load Hugging Face pipelines once at startup
-        self.sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english"
-        )
-        self.auth_classifier = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli"
-        )
+    def __init__(self, sentiment_analyzer=None, cache_size: int = 4096):
+        # The Hugging Face pipelines are loaded on first use (see the properties below);
+        # an already-loaded sentiment pipeline can be passed in instead
+        if sentiment_analyzer is not None:
+            self.sentiment_analyzer = sentiment_analyzer
+        # Story scores are a pure function of the text, so they are cached by its SHA-256
+        self._score_cache = BoundedCache(max_size=cache_size)
+        # How authenticity is computed; can be swapped for a batched version
+        self.authenticity_fn = self.check_authenticity
         self.fraud_keywords = [
             "guarantee returns", "double your money", "urgent investment",
             "lottery", "inheritance", "100% safe", "get rich quick"
         ]
+        # All fraud keywords in one alternation, scanned in a single pass
+        fraud_pattern = r"\b(?:" + "|".join(re.escape(k) for k in self.fraud_keywords) + r")\b"
+        self._fraud_re = re.compile(fraud_pattern, re.IGNORECASE)
+        self._fraud_lower_re = re.compile(fraud_pattern)
+
+    # int8 ONNX with TRUST_MODEL_BACKEND=onnx; shared with any other user of the same model
+    @cached_property
+    def sentiment_analyzer(self):
+        return load_text_pipeline(
+            "sentiment-analysis",
+            "distilbert-base-uncased-finetuned-sst-2-english"
+        )
+
+    @cached_property
+    def auth_classifier(self):
+        # BART-MNLI (~1.6 GB) is only loaded once authenticity is actually scored
+        return load_text_pipeline(
+            "zero-shot-classification",
+            "facebook/bart-large-mnli"
+        )
 
     def check_readability(self, text: str) -> float:
         """Score readability (0–10)."""
@@ -26,31 +47,50 @@ class StoryNLPVerifier:
 
     def check_authenticity(self, text: str) -> float:
         """Score authenticity (0–5)."""
+        return self.check_authenticity_batch([text])[0]
+
+    def check_authenticity_batch(self, texts: list) -> list:
+        """Authenticity scores (0–5) for many texts in one batched zero-shot call."""
         labels = ["genuine", "fake"]
-        result = self.auth_classifier(text, candidate_labels=labels)
-        genuine_score = result['scores'][result['labels'].index("genuine")]
-        return round(genuine_score * 5, 2)
+        results = self.auth_classifier(texts, candidate_labels=labels, batch_size=len(texts))
+        if isinstance(results, dict):
+            results = [results]
+        return [
+            round(result['scores'][result['labels'].index("genuine")] * 5, 2)
+            for result in results
+        ]
 
-    def check_emotional_appeal(self, text: str) -> float:
-        """Score emotional intensity (0–5)."""
-        result = self.sentiment_analyzer(text[:512])[0]
+    def check_emotional_appeal(self, text: str, sentiment: dict = None) -> float:
+        """Score emotional intensity (0–5). Reuses a precomputed sentiment result if given."""
+        result = sentiment or self.sentiment_analyzer(text[:512])[0]
         if result['label'].upper() in ["POSITIVE", "NEGATIVE"]:
             return round(result['score'] * 5, 2)
         return 0.0
 
-    def check_fraud_markers(self, text: str) -> int:
-        """Return fraud penalty (-5 to 0)."""
-        penalty = 0
-        for keyword in self.fraud_keywords:
-            if re.search(rf"\b{re.escape(keyword)}\b", text, re.IGNORECASE):
-                penalty -= 1
-        return max(-5, penalty)
+    def check_fraud_markers(self, text: str, lower: str = None) -> int:
+        """Return fraud penalty (-5 to 0). Pass `lower` (casefolded text) to skip case-insensitive matching."""
+        # One point per distinct keyword present
+        if lower is not None:
+            matched = set(self._fraud_lower_re.findall(lower))
+        else:
+            matched = {match.lower() for match in self._fraud_re.findall(text)}
+        return max(-5, -len(matched))
+
+    def score_story(self, text: str, sentiment: dict = None, lower: str = None) -> float:
+        """Total story quality score (0–20). Cached per story text."""
+        key = text_cache_key(text)
+        cached = self._score_cache.get(key)
+        if cached is not None:
+            return cached
 
-    def score_story(self, text: str) -> float:
-        """Total story quality score (0–20)."""
+        # With a batched authenticity_fn, queue the BART call first and do the
+        # pure-Python checks (textstat readability, fraud markers) while it runs
+        pending = self.authenticity_fn.submit(text) if hasattr(self.authenticity_fn, "submit") else None
         readability = self.check_readability(text)       # 0–10
-        authenticity = self.check_authenticity(text)     # 0–5
-        emotion = self.check_emotional_appeal(text)      # 0–5
-        fraud_penalty = self.check_fraud_markers(text)   # -5 to 0
+        emotion = self.check_emotional_appeal(text, sentiment)  # 0–5
+        fraud_penalty = self.check_fraud_markers(text, lower)   # -5 to 0
+        authenticity = pending.result() if pending else self.authenticity_fn(text)  # 0–5
         total = readability + authenticity + emotion + fraud_penalty
-        return round(max(0, min(20, total)), 2)
+        score = round(max(0, min(20, total)), 2)
+        self._score_cache.put(key, score)
+        return score
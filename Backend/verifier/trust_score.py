@@ -1,33 +1,68 @@
 import logging
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sub-score weights (total 1.0); adjust for your use case
+FACE_WEIGHT = 0.2
+DOC_WEIGHT = 0.2
+EMOTION_WEIGHT = 0.15
+ENGAGEMENT_WEIGHT = 0.1
+STORY_WEIGHT = 0.25
+ADMIN_WEIGHT = 0.1
+
 def calculate_trust_score(face_score: float, doc_score: float, emotion_score: float, engagement_score: float, story_score: float, admin_adjustment: float = 0.0) -> float:
 	"""
 	Aggregates all sub-scores into a final trust score (0-100).
 	Weights can be adjusted for your use case.
 	"""
 	# All inputs should be normalized (0-1 or 0-20 for story)
-	# Example weights (total 1.0):
-	weights = {
-		'face': 0.2,
-		'doc': 0.2,
-		'emotion': 0.15,
-		'engagement': 0.1,
-		'story': 0.25,
-		'admin': 0.1
-	}
 	# Normalize story_score to 0-1 if it's 0-20
 	story_score_norm = story_score / 20 if story_score > 1 else story_score
 	trust_score = (
-		weights['face'] * face_score +
-		weights['doc'] * doc_score +
-		weights['emotion'] * emotion_score +
-		weights['engagement'] * engagement_score +
-		weights['story'] * story_score_norm +
-		weights['admin'] * admin_adjustment
+		FACE_WEIGHT * face_score +
+		DOC_WEIGHT * doc_score +
+		EMOTION_WEIGHT * emotion_score +
+		ENGAGEMENT_WEIGHT * engagement_score +
+		STORY_WEIGHT * story_score_norm +
+		ADMIN_WEIGHT * admin_adjustment
 	) * 100
 	trust_score = round(trust_score, 2)
 	logger.info(f"Final trust score: {trust_score}")
 	return trust_score
+
+# Weight vector in the column order of trust_score_matrix
+TRUST_WEIGHTS = np.array(
+	[FACE_WEIGHT, DOC_WEIGHT, EMOTION_WEIGHT, ENGAGEMENT_WEIGHT, STORY_WEIGHT, ADMIN_WEIGHT],
+	dtype=np.float64
+)
+
+def trust_score_matrix(face_scores, doc_scores, emotion_scores, engagement_scores, story_scores, admin_adjustments) -> np.ndarray:
+	"""
+	Stacks per-record sub-scores into an (N, 6) matrix (story normalized to 0-1),
+	columns in TRUST_WEIGHTS order.
+	"""
+	story_scores = np.asarray(story_scores, dtype=np.float64)
+	return np.stack([
+		np.asarray(face_scores, dtype=np.float64),
+		np.asarray(doc_scores, dtype=np.float64),
+		np.asarray(emotion_scores, dtype=np.float64),
+		np.asarray(engagement_scores, dtype=np.float64),
+		np.where(story_scores > 1, story_scores / 20, story_scores),
+		np.asarray(admin_adjustments, dtype=np.float64)
+	], axis=1)
+
+def calculate_trust_scores(face_scores, doc_scores, emotion_scores, engagement_scores, story_scores, admin_adjustments, weights: np.ndarray = TRUST_WEIGHTS) -> list:
+	"""
+	Vectorized calculate_trust_score for many records at once (e.g. after a weight change).
+	Each argument is a sequence with one value per record. Returns a list of scores that
+	are identical to the scalar path's: the weighted sum is accumulated column by column
+	in the same order (a BLAS dot product may sum in another order and differ in the last
+	bit), and rounded with Python's round rather than np.round.
+	"""
+	scores = trust_score_matrix(face_scores, doc_scores, emotion_scores, engagement_scores, story_scores, admin_adjustments)
+	total = scores[:, 0] * weights[0]
+	for column in range(1, scores.shape[1]):
+		total = total + scores[:, column] * weights[column]
+	return [round(score, 2) for score in (total * 100).tolist()]
@@ -0,0 +1,8 @@
+# wsgi.py
+from app import app, db
+
+# Make sure tables exist when started by a WSGI server instead of `python app.py`
+with app.app_context():
+    db.create_all()
+
+application = app